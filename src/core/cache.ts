@@ -0,0 +1,37 @@
+import fs from 'fs-extra';
+import path from 'path';
+import crypto from 'crypto';
+
+export const CACHE_DIR = '.curscli/cache/responses';
+
+export interface CacheableMessage {
+  role: string;
+  content: string;
+}
+
+export class ResponseCache {
+  private dir: string;
+
+  constructor(dir: string = CACHE_DIR) {
+    this.dir = dir;
+  }
+
+  makeKey(model: string, messages: CacheableMessage[]): string {
+    const payload = JSON.stringify([model, messages.map(m => [m.role, m.content])]);
+    return crypto.createHash('sha256').update(payload).digest('hex');
+  }
+
+  async get(key: string): Promise<string | null> {
+    try {
+      const entry = await fs.readJson(path.join(this.dir, `${key}.json`));
+      return typeof entry.response === 'string' ? entry.response : null;
+    } catch {
+      return null;
+    }
+  }
+
+  async set(key: string, response: string): Promise<void> {
+    await fs.ensureDir(this.dir);
+    await fs.writeJson(path.join(this.dir, `${key}.json`), { response, cachedAt: Date.now() });
+  }
+}
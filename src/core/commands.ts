@@ -1,17 +1,45 @@
 import { exec } from 'child_process';
 
-export function runCommand(command: string, onData: (data: string) => void, onExit: (code: number) => void) {
+export function runCommand(command: string, onData: (data: string) => void, onExit: (code: number) => void, flushIntervalMs: number = 50) {
     const process = exec(command);
 
+    // Coalesce output chunks on a short timer before invoking onData.
+    // Chatty commands can emit hundreds of data events per second, and
+    // every callback costs the caller a state update and re-render;
+    // batching amortizes that to at most one flush per interval.
+    let buffer = '';
+    let flushTimer: NodeJS.Timeout | null = null;
+
+    const flush = () => {
+        flushTimer = null;
+        if (buffer) {
+            const out = buffer;
+            buffer = '';
+            onData(out);
+        }
+    };
+
+    const queue = (data: string) => {
+        buffer += data;
+        if (!flushTimer) {
+            flushTimer = setTimeout(flush, flushIntervalMs);
+        }
+    };
+
     process.stdout?.on('data', (data) => {
-        onData(data.toString());
+        queue(data.toString());
     });
 
     process.stderr?.on('data', (data) => {
-        onData(data.toString());
+        queue(data.toString());
     });
 
-    process.on('exit', (code) => {
+    // 'close' rather than 'exit': stdio can still emit data between the
+    // two, and a late chunk would restart the timer and deliver output
+    // after onExit. 'close' only fires once all streams have drained.
+    process.on('close', (code) => {
+        if (flushTimer) clearTimeout(flushTimer);
+        flush();
         onExit(code || 0);
     });
 
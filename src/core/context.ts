@@ -1,19 +1,60 @@
-import { get_encoding } from 'tiktoken';
+import { get_encoding, Tiktoken } from 'tiktoken';
 import { ChatMessage } from '../ui/types.js';
 
+// One lazily-initialized encoder shared by all ContextManager instances;
+// get_encoding loads the cl100k_base ranks into WASM, which is far too
+// expensive to repeat per instance.
+let sharedEncoder: Tiktoken | null = null;
+
+function encoder(): Tiktoken {
+    if (!sharedEncoder) {
+        sharedEncoder = get_encoding('cl100k_base');
+    }
+    return sharedEncoder;
+}
+
+// Swap a compacted history snapshot into the live message list. The
+// live list may have moved on while compaction's network call was in
+// flight - a prompt submitted mid-completion lands *before* the
+// snapshot's final message - so only swap when the list still begins
+// with the exact snapshot, identified by the snapshot's last element
+// sitting at its expected position. Otherwise leave the list untouched;
+// compaction simply triggers again on a later turn.
+export function applyCompactedHistory(prev: ChatMessage[], snapshot: ChatMessage[], compacted: ChatMessage[]): ChatMessage[] {
+    if (snapshot.length === 0 || prev[snapshot.length - 1] !== snapshot[snapshot.length - 1]) {
+        return prev;
+    }
+    return [...compacted, ...prev.slice(snapshot.length)];
+}
+
 export class ContextManager {
-    private encoder;
     private maxTokens: number;
     private reservedResponseTokens: number;
+    // Messages are never edited after creation, so their token count can
+    // be computed once and reused; re-encoding the whole history each
+    // turn would be quadratic over a session.
+    private tokenCounts = new WeakMap<ChatMessage, number>();
 
     constructor(maxTokens: number = 32000, reservedResponseTokens: number = 2000) {
-        this.encoder = get_encoding('cl100k_base');
         this.maxTokens = maxTokens;
         this.reservedResponseTokens = reservedResponseTokens;
     }
 
     public countTokens(text: string): number {
-        return this.encoder.encode(text).length;
+        return encoder().encode(text).length;
+    }
+
+    public countMessageTokens(msg: ChatMessage): number {
+        let count = this.tokenCounts.get(msg);
+        if (count === undefined) {
+            count = this.countTokens(msg.content);
+            this.tokenCounts.set(msg, count);
+        }
+        return count;
+    }
+
+    public totalTokens(messages: ChatMessage[]): number {
+        return messages.reduce((acc, msg) => acc + this.countMessageTokens(msg), 0);
     }
 
     public pruneMessages(messages: ChatMessage[]): ChatMessage[] {
@@ -23,15 +64,11 @@ export class ContextManager {
         const lastUserMessage = messages[messages.length - 1];
 
         // Essential messages that must be kept
-        const essentialMessages = [
-            ...(systemMessage ? [systemMessage] : []),
-            ...(lastUserMessage && lastUserMessage !== systemMessage ? [lastUserMessage] : [])
-        ];
-
-        // Ensure we don't duplicate if system message was the last message (unlikely but possible)
-        const uniqueEssentialMessages = Array.from(new Set(essentialMessages));
-
-        let currentTokens = uniqueEssentialMessages.reduce((acc, msg) => acc + this.countTokens(msg.content), 0);
+        let currentTokens = 0;
+        if (systemMessage) currentTokens += this.countMessageTokens(systemMessage);
+        if (lastUserMessage && lastUserMessage !== systemMessage) {
+            currentTokens += this.countMessageTokens(lastUserMessage);
+        }
         const availableTokens = this.maxTokens - this.reservedResponseTokens;
 
         if (currentTokens > availableTokens) {
@@ -39,26 +76,30 @@ export class ContextManager {
             // We might need to truncate the last message, but for now, let's just warn or return what we have.
             // In a real scenario, we might truncate the content of the last message.
             console.warn('Warning: Essential messages exceed token limit. Truncation may occur.');
-            return uniqueEssentialMessages;
+            const essentials: ChatMessage[] = [];
+            if (systemMessage) essentials.push(systemMessage);
+            if (lastUserMessage && lastUserMessage !== systemMessage) essentials.push(lastUserMessage);
+            return essentials;
         }
 
-        // We want to keep as many recent messages as possible.
-        // So we iterate backwards from the second-to-last message.
+        // We want to keep as many recent messages as possible, so walk
+        // backwards from the second-to-last message, push, and reverse
+        // once at the end. This runs on every send, so avoid the
+        // intermediate filtered copy and the per-insert unshift (which
+        // re-copies the kept array each time).
         const keptMessages: ChatMessage[] = [];
 
-        // Filter out system and last message from the middle pool
-        const middleMessages = messages.filter(m => m !== systemMessage && m !== lastUserMessage);
-
-        for (let i = middleMessages.length - 1; i >= 0; i--) {
-            const msg = middleMessages[i];
-            const tokens = this.countTokens(msg.content);
-            if (currentTokens + tokens <= availableTokens) {
-                keptMessages.unshift(msg);
-                currentTokens += tokens;
-            } else {
+        for (let i = messages.length - 2; i >= 0; i--) {
+            const msg = messages[i];
+            if (msg === systemMessage) continue;
+            const tokens = this.countMessageTokens(msg);
+            if (currentTokens + tokens > availableTokens) {
                 break; // Stop once we hit the limit
             }
+            keptMessages.push(msg);
+            currentTokens += tokens;
         }
+        keptMessages.reverse();
 
         // Reconstruct the final list in chronological order
         const result: ChatMessage[] = [];
@@ -70,6 +111,10 @@ export class ContextManager {
     }
 
     public dispose() {
-        this.encoder.free();
+        // The encoder is shared; free it and let the next use re-init.
+        if (sharedEncoder) {
+            sharedEncoder.free();
+            sharedEncoder = null;
+        }
     }
 }
@@ -24,17 +24,23 @@ export async function searchProject(query: string, dir: string): Promise<SearchR
 
 function parseRgOutput(output: string): SearchResult[] {
   const results: SearchResult[] = [];
-  const lines = output.trim().split('\n');
-  for (const line of lines) {
-    // rg output: file:line:content
-    const parts = line.split(':');
-    if (parts.length >= 3) {
-      results.push({
-        file: parts[0],
-        line: parseInt(parts[1], 10),
-        content: parts.slice(2).join(':').trim()
-      });
-    }
+  const trimmed = output.trim();
+  if (!trimmed) return results;
+
+  for (const line of trimmed.split('\n')) {
+    // rg output: file:line:content. Only the first two separators
+    // matter, so slice around them instead of splitting the whole line
+    // and re-joining the content (which allocates per colon in it).
+    const fileEnd = line.indexOf(':');
+    if (fileEnd <= 0) continue;
+    const lineEnd = line.indexOf(':', fileEnd + 1);
+    if (lineEnd < 0) continue;
+
+    results.push({
+      file: line.slice(0, fileEnd),
+      line: parseInt(line.slice(fileEnd + 1, lineEnd), 10),
+      content: line.slice(lineEnd + 1).trim()
+    });
   }
   return results;
 }
@@ -1,36 +1,121 @@
 #!/usr/bin/env node
-import React from 'react';
-import { render } from 'ink';
-import App from './ui/App.js';
 import { Command } from 'commander';
 import chalk from 'chalk';
 
-const program = new Command();
-
-program
-  .name('curscli')
-  .description('AI Code Assistant CLI')
-  .version('0.1.0');
-
-program.command('start')
-  .description('Start the TUI')
-  .action(() => {
-    console.clear();
-    render(React.createElement(App));
-  });
-
-program.command('doctor')
-  .description('Check prerequisites')
-  .action(async () => {
-    console.log(chalk.blue('Checking prerequisites...'));
-    // TODO: Implement actual checks
-    console.log(chalk.green('✓ Node.js'));
-    console.log(chalk.green('✓ Git'));
-    console.log(chalk.yellow('! ripgrep (optional, recommended)'));
-    console.log(chalk.green('All systems go!'));
-  });
-
-program.parse(process.argv);
+// Built exactly once per process. Subcommand actions dynamically import
+// their heavy modules, so constructing the command graph itself stays
+// cheap enough to pay on every invocation.
+export function buildProgram(): Command {
+  const program = new Command();
+
+  program
+    .name('curscli')
+    .description('AI Code Assistant CLI')
+    .version('0.1.0');
+
+  // Callback form: the epilog string is only assembled when help is
+  // actually rendered, so normal invocations never build or wrap it.
+  program.addHelpText('after', () => `
+Examples:
+  $ curscli start                                  Launch the TUI
+  $ curscli ask "explain this stack trace"         Stream a one-off answer
+  $ curscli batch --prompts-file prompts.txt --json
+  $ curscli doctor                                 Check prerequisites
+`);
+
+  program.command('start')
+    .description('Start the TUI')
+    .action(async () => {
+      // React, ink and the provider stack (openai SDK, tiktoken WASM) are
+      // only loaded when the TUI actually starts, so short commands like
+      // --help and doctor don't pay their import cost.
+      const [{ default: React }, { render }, { default: App }] = await Promise.all([
+        import('react'),
+        import('ink'),
+        import('./ui/App.js')
+      ]);
+      console.clear();
+      render(React.createElement(App));
+    });
+
+  program.command('ask <prompt>')
+    .description('Ask a single prompt and stream the answer to stdout')
+    .action(async (prompt) => {
+      const { megallmProvider } = await import('./providers/megallm.js');
+
+      // Write deltas straight to stdout; console.log per token would pay
+      // formatting plus a trailing newline on every chunk. Bind write
+      // once so the per-delta path is a single call, not a closure plus
+      // a method lookup.
+      const write = process.stdout.write.bind(process.stdout);
+      await megallmProvider.sendMessageStream(
+        [{ id: 'ask', role: 'user', content: prompt, timestamp: Date.now() }],
+        write
+      );
+      process.stdout.write('\n');
+      megallmProvider.dispose();
+    });
+
+  program.command('batch')
+    .description('Run prompts from a file concurrently (one prompt per line)')
+    .requiredOption('--prompts-file <path>', 'File with one prompt per line')
+    .option('--json', 'Emit results as a JSON array on stdout')
+    .option('--cache', 'Reuse cached responses for identical prompts')
+    .option('--concurrency <n>', 'Max prompts in flight at once', '20')
+    .action(async (options) => {
+      const { readFile } = await import('./core/filesystem.js');
+      const { megallmProvider } = await import('./providers/megallm.js');
+
+      let content: string;
+      try {
+        content = await readFile(options.promptsFile);
+      } catch (error: any) {
+        console.error(chalk.red(`Could not read prompts file: ${error.message}`));
+        process.exitCode = 1;
+        return;
+      }
+
+      const prompts = content.split('\n').map(l => l.trim()).filter(Boolean);
+      if (prompts.length === 0) {
+        console.error(chalk.red('No prompts found in file.'));
+        process.exitCode = 1;
+        return;
+      }
+
+      if (options.cache) megallmProvider.setCacheEnabled(true);
+      const responses = await megallmProvider.sendPrompts(prompts, parseInt(options.concurrency, 10) || 20);
+      if (options.json) {
+        // Serialize the whole envelope once and write a single buffer;
+        // cheaper than a console.log per prompt for large batches.
+        const output = prompts.map((prompt, i) => ({ prompt, response: responses[i] }));
+        process.stdout.write(JSON.stringify(output, null, 2) + '\n');
+      } else {
+        responses.forEach((response, i) => {
+          console.log(chalk.blue(`--- Prompt ${i + 1}: ${prompts[i]}`));
+          console.log(response);
+        });
+      }
+      megallmProvider.dispose();
+    });
+
+  program.command('doctor')
+    .description('Check prerequisites')
+    .action(async () => {
+      console.log(chalk.blue('Checking prerequisites...'));
+      // TODO: Implement actual checks
+      console.log(chalk.green('✓ Node.js'));
+      console.log(chalk.green('✓ Git'));
+      console.log(chalk.yellow('! ripgrep (optional, recommended)'));
+      console.log(chalk.green('All systems go!'));
+    });
+
+  return program;
+}
+
+const program = buildProgram();
+// parseAsync so rejections from async command actions propagate instead
+// of becoming unhandled promise rejections.
+await program.parseAsync(process.argv);
 
 if (!process.argv.slice(2).length) {
   program.outputHelp();
@@ -1,35 +1,27 @@
 import OpenAI from 'openai';
+import https from 'https';
 import { AIProvider } from './mock.js'; // Assuming we re-use the interface
 import { ChatMessage } from '../ui/types.js';
 import { ContextManager } from '../core/context.js';
+import { ResponseCache } from '../core/cache.js';
 
-export class MegaLLMProvider implements AIProvider {
-    private client: OpenAI;
-    private contextManager: ContextManager;
-
-    constructor() {
-        const apiKey = process.env.MEGALLM_API_KEY;
-        if (!apiKey) {
-            console.warn('MEGALLM_API_KEY is not set. Provider may fail.');
-        }
-
-        this.client = new OpenAI({
-            baseURL: 'https://ai.megallm.io/v1',
-            apiKey: apiKey
-        });
+const BASE_URL = 'https://ai.megallm.io/v1';
+const MODEL = 'deepseek-ai/deepseek-v3.1-terminus';
 
-        // 32k limit, reserve 4k for output
-        this.contextManager = new ContextManager(32000, 4000);
-    }
+// Compact once the conversation passes this many tokens. Well under the
+// 32k window so the sliding-window pruner stays a fallback, not the norm:
+// without compaction every turn retransmits the full history, so session
+// cost grows quadratically with turn count.
+const COMPACTION_THRESHOLD_TOKENS = 8000;
 
-    async sendMessage(messages: ChatMessage[]): Promise<string> {
-        // Ensure system prompt exists
-        let currentMessages = [...messages];
-        if (!currentMessages.some(m => m.role === 'system')) {
-            const systemPrompt: ChatMessage = {
-                id: 'system',
-                role: 'system',
-                content: `You are an expert software engineer and CLI coding assistant.
+// Built once at module load so every request resends a byte-identical
+// prefix; provider-side prompt caches key on the exact prefix content,
+// so rebuilding this per call would be wasted work (and a fresh
+// timestamp per turn invites accidental cache-busting edits).
+const SYSTEM_PROMPT: ChatMessage = {
+    id: 'system',
+    role: 'system',
+    content: `You are an expert software engineer and CLI coding assistant.
 Your goal is to help the user write, debug, and understand code.
 You are running inside a terminal environment.
 
@@ -48,32 +40,218 @@ GUIDELINES:
 5. Do not include line numbers or timestamps in the diff header, just the filenames (e.g., a/path/to/file b/path/to/file or just path/to/file).
 6. Always check the user's request carefully.
 `,
-                timestamp: Date.now()
-            };
-            currentMessages.unshift(systemPrompt);
+    timestamp: 0
+};
+
+export class MegaLLMProvider implements AIProvider {
+    private client: OpenAI;
+    private contextManager: ContextManager;
+    private agent: https.Agent;
+    private cache = new ResponseCache();
+    private cacheEnabled = process.env.CURSCLI_CACHE === '1';
+    // Chat history is append-only, so the wire shape of each message can
+    // be built once and reused across turns instead of reallocated on
+    // every send. The two-field literals also stay monomorphic for the
+    // JSON serializer. WeakMap keeps pruned-away messages collectable.
+    private apiShape = new WeakMap<ChatMessage, { role: 'user' | 'assistant' | 'system'; content: string }>();
+
+    constructor() {
+        const apiKey = process.env.MEGALLM_API_KEY;
+        if (!apiKey) {
+            console.warn('MEGALLM_API_KEY is not set. Provider may fail.');
         }
 
+        // Keepalive agent so sequential chat turns reuse the same TLS
+        // connection instead of paying the handshake on every request.
+        // LIFO scheduling funnels sequential turns onto the most recently
+        // used socket, so one hot connection serves the whole session
+        // (the SDK's transport is HTTP/1.1-only, so this is the closest
+        // we get to HTTP/2-style single-connection reuse).
+        this.agent = new https.Agent({
+            keepAlive: true,
+            keepAliveMsecs: 30000,
+            maxSockets: 100,
+            maxFreeSockets: 20,
+            scheduling: 'lifo'
+        });
+
+        this.client = new OpenAI({
+            baseURL: BASE_URL,
+            apiKey: apiKey,
+            httpAgent: this.agent,
+            timeout: 60000
+        });
+
+        // 32k limit, reserve 4k for output
+        this.contextManager = new ContextManager(32000, 4000);
+
+        this.warmup();
+    }
+
+    private warmup() {
+        // Open a TCP+TLS connection to the gateway before the first real
+        // request. The socket lands back in the keepalive pool, so by the
+        // time the user finishes typing their first prompt the handshake
+        // cost (~150-300ms) is already paid. Fire-and-forget; failures
+        // here just mean the first completion handshakes as before.
+        const req = https.request(BASE_URL, { method: 'HEAD', agent: this.agent });
+        req.on('error', () => {});
+        req.on('response', res => res.resume());
+        req.end();
+    }
+
+    private toApiMessages(messages: ChatMessage[]) {
+        // Assemble [static system prefix] + [history]; never mutate the
+        // prefix so the provider sees the same leading bytes every turn.
+        const currentMessages = messages.some(m => m.role === 'system')
+            ? [...messages]
+            : [SYSTEM_PROMPT, ...messages];
+
         // Prune context
         const prunedMessages = this.contextManager.pruneMessages(currentMessages);
 
-        // Convert to OpenAI format
-        const apiMessages = prunedMessages.map(msg => ({
-            role: msg.role as 'user' | 'assistant' | 'system',
-            content: msg.content
-        }));
+        // Convert to OpenAI format, reusing prior conversions
+        return prunedMessages.map(msg => {
+            let api = this.apiShape.get(msg);
+            if (!api) {
+                api = { role: msg.role as 'user' | 'assistant' | 'system', content: msg.content };
+                this.apiShape.set(msg, api);
+            }
+            return api;
+        });
+    }
+
+    async sendMessage(messages: ChatMessage[]): Promise<string> {
+        const apiMessages = this.toApiMessages(messages);
+
+        // Identical (model, messages) pairs can skip the network entirely
+        // on reruns; opt-in since sampling is non-deterministic by default.
+        const cacheKey = this.cacheEnabled ? this.cache.makeKey(MODEL, apiMessages) : null;
+        if (cacheKey) {
+            const cached = await this.cache.get(cacheKey);
+            if (cached !== null) return cached;
+        }
 
         try {
             const response = await this.client.chat.completions.create({
-                model: 'deepseek-ai/deepseek-v3.1-terminus',
+                model: MODEL,
                 messages: apiMessages
             });
 
-            return response.choices[0]?.message?.content || 'No response received.';
+            const content = response.choices[0]?.message?.content || 'No response received.';
+            if (cacheKey) await this.cache.set(cacheKey, content);
+            return content;
+        } catch (error: any) {
+            console.error('MegaLLM Error:', error);
+            return `Error communicating with MegaLLM: ${error.message}`;
+        }
+    }
+
+    async sendMessageStream(messages: ChatMessage[], onDelta: (delta: string) => void): Promise<string> {
+        const apiMessages = this.toApiMessages(messages);
+
+        try {
+            const stream = await this.client.chat.completions.create({
+                model: MODEL,
+                messages: apiMessages,
+                stream: true
+            });
+
+            // Collect deltas in an array and join once at the end;
+            // growing a string with += copies it on every chunk. This
+            // loop runs per token, so walk the chunk shape once and skip
+            // empty/absent deltas with a single check.
+            const parts: string[] = [];
+            for await (const chunk of stream) {
+                const choice = chunk.choices[0];
+                if (!choice) continue;
+                const delta = choice.delta.content;
+                if (!delta) continue;
+                onDelta(delta);
+                parts.push(delta);
+            }
+            return parts.join('');
         } catch (error: any) {
             console.error('MegaLLM Error:', error);
             return `Error communicating with MegaLLM: ${error.message}`;
         }
     }
+
+    async compactHistory(messages: ChatMessage[]): Promise<ChatMessage[]> {
+        if (this.contextManager.totalTokens(messages) <= COMPACTION_THRESHOLD_TOKENS) {
+            return messages;
+        }
+
+        // Replace the oldest half with a single summary message and keep
+        // the recent half verbatim. The static system prefix is added in
+        // toApiMessages, so prompt caching on it still hits.
+        const splitIndex = Math.floor(messages.length / 2);
+        if (splitIndex === 0) return messages;
+
+        const oldest = messages.slice(0, splitIndex);
+        const recent = messages.slice(splitIndex);
+        const transcript = oldest.map(m => `${m.role}: ${m.content}`).join('\n');
+
+        try {
+            const response = await this.client.chat.completions.create({
+                model: MODEL,
+                messages: [
+                    { role: 'system', content: 'Summarize the following conversation in at most 400 tokens. Preserve decisions, open questions, file paths and code references.' },
+                    { role: 'user', content: transcript }
+                ],
+                temperature: 0
+            });
+
+            const summary = response.choices[0]?.message?.content;
+            if (!summary) return messages;
+
+            const summaryMsg: ChatMessage = {
+                id: `summary-${Date.now()}`,
+                role: 'assistant',
+                content: `Summary of earlier conversation:\n${summary}`,
+                timestamp: Date.now()
+            };
+            return [summaryMsg, ...recent];
+        } catch {
+            // Summarization is best-effort; the sliding-window pruner
+            // still bounds what actually goes over the wire.
+            return messages;
+        }
+    }
+
+    setCacheEnabled(enabled: boolean) {
+        this.cacheEnabled = enabled;
+    }
+
+    async sendPrompts(prompts: string[], concurrency: number = 20): Promise<string[]> {
+        // Run prompts through a bounded worker pool sized to the
+        // keepalive pool. Unbounded fan-out on a large prompt file just
+        // queues cold connections behind the agent's socket limit and
+        // bloats event-loop bookkeeping without adding throughput.
+        const results = new Array<string>(prompts.length);
+        let next = 0;
+
+        const worker = async () => {
+            while (next < prompts.length) {
+                const i = next++;
+                results[i] = await this.sendMessage([{
+                    id: `batch-${i}`,
+                    role: 'user',
+                    content: prompts[i],
+                    timestamp: Date.now()
+                }]);
+            }
+        };
+
+        const workers = Math.max(1, Math.min(concurrency, prompts.length));
+        await Promise.all(Array.from({ length: workers }, worker));
+        return results;
+    }
+
+    dispose() {
+        this.agent.destroy();
+        this.contextManager.dispose();
+    }
 }
 
 export const megallmProvider = new MegaLLMProvider();
@@ -7,6 +7,16 @@ import Palette from './components/Palette.js';
 import { parsePatch, applyPatch } from '../core/patch.js';
 import { runCommand } from '../core/commands.js';
 
+// Cap the command log so each output chunk copies a bounded array
+// instead of an ever-growing one; unbounded spreads per data event made
+// long-running commands quadratic in total output.
+const MAX_COMMAND_LOGS = 500;
+
+const appendLogs = (logs: string[], lines: string[]): string[] => {
+    const next = logs.concat(lines);
+    return next.length > MAX_COMMAND_LOGS ? next.slice(next.length - MAX_COMMAND_LOGS) : next;
+};
+
 const App = () => {
   const [state, setState] = useState<UIState>({
     activeTab: 'chat',
@@ -38,8 +48,8 @@ const App = () => {
   const executeCommand = (cmd: string) => {
       setState(s => ({ ...s, isCommandRunning: true, commandLogs: [`> ${cmd}`] }));
       runCommand(cmd,
-          (data) => setState(s => ({ ...s, commandLogs: [...s.commandLogs, ...data.trim().split('\n')] })),
-          (code) => setState(s => ({ ...s, isCommandRunning: false, commandLogs: [...s.commandLogs, `Exited with code ${code}`] }))
+          (data) => setState(s => ({ ...s, commandLogs: appendLogs(s.commandLogs, data.trim().split('\n')) })),
+          (code) => setState(s => ({ ...s, isCommandRunning: false, commandLogs: appendLogs(s.commandLogs, [`Exited with code ${code}`]) }))
       );
   };
 
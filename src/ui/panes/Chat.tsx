@@ -3,6 +3,7 @@ import { Box, Text } from 'ink';
 import TextInput from 'ink-text-input';
 import { ChatMessage } from '../types.js';
 import { megallmProvider } from '../../providers/megallm.js';
+import { applyCompactedHistory } from '../../core/context.js';
 
 interface ChatProps {
     onNewMessage: (msg: ChatMessage) => void;
@@ -21,14 +22,30 @@ const Chat: React.FC<ChatProps> = ({ onNewMessage }) => {
     setInput('');
     setIsLoading(true);
 
+    let history: ChatMessage[] | undefined;
     try {
         const response = await megallmProvider.sendMessage([...messages, userMsg]);
         const aiMsg: ChatMessage = { id: (Date.now() + 1).toString(), role: 'assistant', content: response, timestamp: Date.now() };
         setMessages(prev => [...prev, aiMsg]);
         onNewMessage(aiMsg);
+        history = [...messages, userMsg, aiMsg];
     } finally {
         setIsLoading(false);
     }
+
+    // Once the conversation gets long, fold the oldest turns into a
+    // summary so later turns stop retransmitting the full history.
+    // Runs after isLoading clears so it never blocks the next input;
+    // applyCompactedHistory only swaps the prefix when the live list
+    // still starts with our snapshot, so prompts submitted during the
+    // completion or summarization round trips are never dropped.
+    if (history) {
+        const compacted = await megallmProvider.compactHistory(history);
+        if (compacted !== history) {
+            const snapshot = history;
+            setMessages(prev => applyCompactedHistory(prev, snapshot, compacted));
+        }
+    }
   };
 
   return (
@@ -0,0 +1,32 @@
+import { ResponseCache } from '../src/core/cache.js';
+import fs from 'fs-extra';
+import path from 'path';
+
+describe('ResponseCache', () => {
+  const testDir = path.join('test-cache', 'responses');
+  const cache = new ResponseCache(testDir);
+
+  afterAll(async () => {
+    await fs.remove('test-cache');
+  });
+
+  test('makeKey is stable and content-sensitive', () => {
+    const messages = [{ role: 'user', content: 'hello' }];
+    const key1 = cache.makeKey('model-a', messages);
+    const key2 = cache.makeKey('model-a', [{ role: 'user', content: 'hello' }]);
+    const key3 = cache.makeKey('model-b', messages);
+    expect(key1).toBe(key2);
+    expect(key1).not.toBe(key3);
+  });
+
+  test('get returns null on miss', async () => {
+    const key = cache.makeKey('model-a', [{ role: 'user', content: 'nothing here' }]);
+    expect(await cache.get(key)).toBeNull();
+  });
+
+  test('set then get round-trips', async () => {
+    const key = cache.makeKey('model-a', [{ role: 'user', content: 'hello' }]);
+    await cache.set(key, 'world');
+    expect(await cache.get(key)).toBe('world');
+  });
+});
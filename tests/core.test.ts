@@ -1,5 +1,7 @@
 import { readFile, writeFile, createBackup, listFiles } from '../src/core/filesystem.js';
 import { GitManager } from '../src/core/git.js';
+import { applyCompactedHistory } from '../src/core/context.js';
+import { ChatMessage } from '../src/ui/types.js';
 import fs from 'fs-extra';
 import path from 'path';
 
@@ -36,3 +38,37 @@ describe('GitManager', () => {
         expect(git).toBeDefined();
     });
 });
+
+describe('applyCompactedHistory', () => {
+    const msg = (id: string, role: ChatMessage['role'] = 'user'): ChatMessage =>
+        ({ id, role, content: id, timestamp: 0 });
+
+    const user1 = msg('user1');
+    const ai1 = msg('ai1', 'assistant');
+    const user2 = msg('user2');
+    const ai2 = msg('ai2', 'assistant');
+    const summary = msg('summary', 'assistant');
+
+    test('swaps the prefix when the list still matches the snapshot', () => {
+        const snapshot = [user1, ai1, user2, ai2];
+        const result = applyCompactedHistory(snapshot, snapshot, [summary, user2, ai2]);
+        expect(result).toEqual([summary, user2, ai2]);
+    });
+
+    test('keeps messages appended during the summarization round trip', () => {
+        const snapshot = [user1, ai1, user2, ai2];
+        const late = msg('late');
+        const result = applyCompactedHistory([...snapshot, late], snapshot, [summary, user2, ai2]);
+        expect(result).toEqual([summary, user2, ai2, late]);
+    });
+
+    test('leaves the list untouched when a prompt landed mid-completion', () => {
+        // A prompt submitted while the completion was in flight sits
+        // *before* the snapshot's final message; a blind slice would
+        // drop it and duplicate ai2.
+        const snapshot = [user1, ai1, user2, ai2];
+        const midFlight = msg('mid-flight');
+        const prev = [user1, ai1, user2, midFlight, ai2];
+        expect(applyCompactedHistory(prev, snapshot, [summary, user2, ai2])).toBe(prev);
+    });
+});